@@ -1,10 +1,11 @@
 # demo.py
 
-import requests
+import httpx
 import os
 import logging
 import asyncio
 import aiohttp
+import aiofiles
 
 # Configure logging
 logging.basicConfig(
@@ -13,7 +14,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def transcribe_async(audio_file_path, quick=True, any_lang=True, server_url="http://localhost:8000"):
+# Query-string values for boolean parameters
+_BOOL = {True: 'true', False: 'false'}
+
+async def transcribe_async(audio_file_path, quick=True, any_lang=True, server_url="http://localhost:8000", session=None):
     """
     Asynchronous transcription example using aiohttp.
 
@@ -22,48 +26,55 @@ async def transcribe_async(audio_file_path, quick=True, any_lang=True, server_ur
         quick (bool): Quick mode (default is True).
         any_lang (bool): Allow any language detection (default is True).
         server_url (str): Server URL (default is http://localhost:8000).
+        session (aiohttp.ClientSession, optional): Session to reuse across calls.
+            A temporary session is created when omitted.
 
     Returns:
         tuple: Transcribed text and elapsed time, or error message and None.
     """
-    async with aiohttp.ClientSession() as session:
-        with open(audio_file_path, 'rb') as f:
-            data = aiohttp.FormData()
-            data.add_field('file', f, filename=os.path.basename(audio_file_path))
-
-            params = {
-                'quick': str(quick).lower(),
-                'any_lang': str(any_lang).lower()
-            }
-
-            async with session.post(f"{server_url}/transcribe", data=data, params=params) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result['text'], result['elapsed_time']
-                else:
-                    error_detail = await response.text()
-                    return f"Error: {response.status} - {error_detail}", None
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await transcribe_async(audio_file_path, quick, any_lang, server_url, session)
 
-def transcribe_sync(audio_file_path, quick=True, any_lang=True, server_url="http://localhost:8000"):
+    async with aiofiles.open(audio_file_path, 'rb') as f:
+        data_bytes = await f.read()
+
+    data = aiohttp.FormData()
+    data.add_field('file', data_bytes, filename=os.path.basename(audio_file_path))
+
+    params = {'quick': _BOOL[quick], 'any_lang': _BOOL[any_lang]}
+
+    async with session.post(f"{server_url}/transcribe", data=data, params=params) as response:
+        if response.status == 200:
+            result = await response.json()
+            return result['text'], result['elapsed_time']
+        else:
+            error_detail = await response.text()
+            return f"Error: {response.status} - {error_detail}", None
+
+def create_session():
     """
-    Synchronous transcription example using requests.
+    Create an aiohttp session with a pooled connector for batches of transcriptions.
 
-    Args:
-        audio_file_path (str): Path to the audio file.
-        quick (bool): Quick mode (default is True).
-        any_lang (bool): Allow any language detection (default is True).
-        server_url (str): Server URL (default is http://localhost:8000).
+    Returns:
+        aiohttp.ClientSession: Session to pass as ``session=`` to transcribe_async.
+    """
+    connector = aiohttp.TCPConnector(limit=64, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+async def _transcribe_httpx(client, endpoint, audio_file_path, quick, any_lang):
+    """
+    Send a single transcription request over a shared httpx client.
 
     Returns:
         tuple: Transcribed text and elapsed time, or error message and None.
     """
-    with open(audio_file_path, 'rb') as f:
-        files = {'file': (os.path.basename(audio_file_path), f, 'audio/wav')}
-        params = {
-            'quick': str(quick).lower(),
-            'any_lang': str(any_lang).lower()
-        }
-        response = requests.post(f"{server_url}/transcribe", files=files, params=params)
+    async with aiofiles.open(audio_file_path, 'rb') as f:
+        data_bytes = await f.read()
+
+    files = {'file': (os.path.basename(audio_file_path), data_bytes, 'audio/wav')}
+    params = {'quick': _BOOL[quick], 'any_lang': _BOOL[any_lang]}
+    response = await client.post(endpoint, files=files, params=params)
 
     if response.status_code == 200:
         result = response.json()
@@ -72,7 +83,47 @@ def transcribe_sync(audio_file_path, quick=True, any_lang=True, server_url="http
         error_detail = response.text
         return f"Error: {response.status_code} - {error_detail}", None
 
-async def main():
+async def transcribe_many(audio_file_paths, quick=True, any_lang=True, server_url="http://localhost:8000", max_concurrency=8):
+    """
+    Transcribe several files concurrently over a shared pool of keep-alive connections.
+
+    Args:
+        audio_file_paths (list[str]): Paths to the audio files.
+        quick (bool): Quick mode (default is True).
+        any_lang (bool): Allow any language detection (default is True).
+        server_url (str): Server URL (default is http://localhost:8000).
+        max_concurrency (int): Maximum requests (and files held in memory) in flight at once (default is 8).
+
+    Returns:
+        list[tuple]: One (text, elapsed time) or (error message, None) tuple per file.
+    """
+    endpoint = f"{server_url}/transcribe"
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=None) as client:
+        async def bounded(path):
+            async with semaphore:
+                return await _transcribe_httpx(client, endpoint, path, quick, any_lang)
+
+        return await asyncio.gather(*[bounded(path) for path in audio_file_paths])
+
+def transcribe_sync(audio_file_path, quick=True, any_lang=True, server_url="http://localhost:8000"):
+    """
+    Synchronous transcription example wrapping transcribe_many.
+
+    Args:
+        audio_file_path (str): Path to the audio file.
+        quick (bool): Quick mode (default is True).
+        any_lang (bool): Allow any language detection (default is True).
+        server_url (str): Server URL (default is http://localhost:8000).
+
+    Returns:
+        tuple: Transcribed text and elapsed time, or error message and None.
+    """
+    return asyncio.run(transcribe_many([audio_file_path], quick, any_lang, server_url))[0]
+
+def main():
     """
     Main function to demonstrate both synchronous and asynchronous transcription.
     """
@@ -92,7 +143,7 @@ async def main():
 
     # Standard mode, any language (asynchronous)
     print("Standard Mode, Multi-language Transcription:")
-    text, duration = await transcribe_async(test_audio, quick=False, any_lang=True)
+    text, duration = asyncio.run(transcribe_async(test_audio, quick=False, any_lang=True))
     if duration:
         print(f"Text: {text}")
         print(f"Duration: {duration:.2f} seconds\n")
@@ -100,4 +151,4 @@ async def main():
         print(text)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
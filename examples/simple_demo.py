@@ -3,6 +3,9 @@
 import requests
 import os
 
+# Query-string values for boolean parameters
+_BOOL = {True: 'true', False: 'false'}
+
 def transcribe_audio(file_path, quick=True, any_lang=True, server_url="http://localhost:8000"):
     """
     Simplified function to transcribe an audio file using the WhisperTurboAPI server.
@@ -26,10 +29,7 @@ def transcribe_audio(file_path, quick=True, any_lang=True, server_url="http://lo
         
     with open(file_path, 'rb') as f:
         files = {'file': (file_path, f, 'audio/wav')}
-        params = {
-            'quick': str(quick).lower(),
-            'any_lang': str(any_lang).lower()
-        }
+        params = {'quick': _BOOL[quick], 'any_lang': _BOOL[any_lang]}
         response = requests.post(f"{server_url}/transcribe", files=files, params=params)
     if response.status_code == 200:
         return response.json()['text']
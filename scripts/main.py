@@ -1,20 +1,32 @@
 # src/main.py
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import os
+import importlib.util
+
+# Enable parallel downloads for the first-run model fetch when hf_transfer is
+# installed. This is read when huggingface_hub is imported, so it must be set
+# before the imports below.
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
 import logging
 import time
-import threading
 import tempfile
 from pathlib import Path
 import json
 import mlx.core as mx
-from .whisper_turbo import Transcriber
+import numpy as np
+from .whisper_turbo import Transcriber, decode_audio
 from huggingface_hub import snapshot_download
-import gc
 import uvicorn
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import aiofiles
+import orjson
 
 # Configure logging
 logging.basicConfig(
@@ -23,16 +35,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the model before the server starts accepting requests.
+    """
+    global decode_pool
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    await asyncio.to_thread(load_model)
+    decode_pool = ThreadPoolExecutor(max_workers=max(1, DECODE_WORKERS), thread_name_prefix="decode")
+    batcher.start()
+    yield
+    await batcher.stop()
+    decode_pool.shutdown(cancel_futures=True)
+
 app = FastAPI(
     title="WhisperTurboAPI",
     description="An optimized FastAPI server for transcribing audio files using the Whisper model with MLX optimization",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Update cache directory to be relative to project
 BASE_DIR = Path(__file__).parent.parent  # Gets the project root directory
 CACHE_DIR = BASE_DIR / 'data' / '.whisper_cache'  # Store cache in data directory
 UPLOAD_DIR = BASE_DIR / 'data' / 'uploads'  # Make upload path absolute
+UPLOAD_CHUNK_SIZE = 1 << 20  # Read uploads in 1 MiB chunks
+MAX_WORKERS = int(os.environ.get('WHISPER_TURBOAPI_MAX_WORKERS', 4))  # Upper bound for gunicorn workers
+WORKER_TIMEOUT = int(os.environ.get('WHISPER_TURBOAPI_WORKER_TIMEOUT', 0))  # gunicorn worker timeout in seconds, 0 disables it
+INFERENCE_CONCURRENCY = int(os.environ.get('WHISPER_TURBOAPI_INFERENCE_CONCURRENCY', 1))  # Concurrent model calls per worker
+BATCH_WINDOW_MS = int(os.environ.get('WHISPER_TURBOAPI_BATCH_WINDOW_MS', 20))  # Time to wait for more requests to batch
+BATCH_MAX = int(os.environ.get('WHISPER_TURBOAPI_BATCH_MAX', 8))  # Maximum requests per batch
+ALLOWED_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.flac'}  # Accepted audio formats
+IN_MEMORY_EXTENSIONS = {'.wav', '.mp3', '.flac'}  # Formats ffmpeg can decode from a pipe without seeking
+IN_MEMORY_MAX_BYTES = 32 << 20  # Larger uploads are streamed to a temp file instead
+DECODE_WORKERS = int(os.environ.get('WHISPER_TURBOAPI_DECODE_WORKERS', 2))  # Threads dedicated to audio decoding
+WARMUP = os.environ.get('WHISPER_TURBOAPI_WARMUP', '1') != '0'  # Run a dummy inference after loading
 
 # Configure CORS (adjust origins as needed)
 app.add_middleware(
@@ -43,13 +82,41 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Global variables for the model
+# Global variables for the model and the audio decoding thread pool
 model = None
-model_loaded = threading.Event()
+decode_pool = None
+
+# Bound concurrent inference so parallel uploads don't oversubscribe the GPU
+inference_semaphore = asyncio.Semaphore(max(1, INFERENCE_CONCURRENCY))
+
+def iter_weights(path):
+    """
+    Lazily yield the safetensors weights renamed and transposed for the model.
+
+    MLX arrays returned by mx.load are not materialized until evaluated, so no
+    tensor data is read here; the conv transposes are scheduled on the CPU
+    stream and only the transposed views end up in the model.
+    """
+    with mx.stream(mx.cpu):
+        for k, v in mx.load(str(path)).items():
+            yield (
+                k.replace("embed_positions.weight", "positional_embedding"),
+                v.swapaxes(1, 2) if ('conv' in k and v.ndim == 3) else v
+            )
+
+def warmup_model(model_instance):
+    """
+    Run one quick transcription of a second of silence so the first real
+    request doesn't pay for MLX kernel compilation.
+    """
+    try:
+        model_instance(path_audio=np.zeros(16000, dtype=np.float32), any_lang=False, quick=True)
+    except Exception as e:
+        logger.warning(f"Model warmup failed: {str(e)}")
 
 def load_model():
     """
-    Load the Whisper model in a background thread.
+    Load the Whisper model. Called once from the app lifespan before serving requests.
     """
     global model
     try:
@@ -60,67 +127,167 @@ def load_model():
         # Paths for cached weights and config
         cached_weights = cache_dir / 'model.safetensors'
         cached_config = cache_dir / 'config.json'
+        canonical_weights = cache_dir / 'model.canonical.safetensors'
 
         # Download model files if not present
-        if not cached_weights.exists() or not cached_config.exists():
-            path_hf = snapshot_download(
+        if not cached_config.exists() or not (canonical_weights.exists() or cached_weights.exists()):
+            # Download straight into the cache directory to avoid copying the weights
+            snapshot_download(
                 repo_id='openai/whisper-large-v3-turbo',
                 allow_patterns=["config.json", "model.safetensors"],
-                cache_dir=cache_dir
+                local_dir=cache_dir
             )
-            # Copy files to cache directory
-            os.system(f'cp {path_hf}/model.safetensors {cached_weights}')
-            os.system(f'cp {path_hf}/config.json {cached_config}')
 
         # Load configuration and weights
         with open(cached_config, 'r') as fp:
             cfg = json.load(fp)
-        weights = mx.load(str(cached_weights))
-        weights = [
-            (
-                k.replace("embed_positions.weight", "positional_embedding"),
-                v.swapaxes(1, 2) if ('conv' in k and v.ndim == 3) else v
-            )
-            for k, v in weights.items()
-        ]
+        if canonical_weights.exists():
+            weights = list(mx.load(str(canonical_weights)).items())
+        else:
+            # Rename and transpose once, then keep the result for later starts
+            weights = list(iter_weights(cached_weights))
+            # Write through a per-process temp file; concurrent workers may race here
+            # (the original model.safetensors is kept since other workers may still be reading it)
+            tmp_weights = None
+            try:
+                fd, tmp_weights = tempfile.mkstemp(dir=cache_dir, suffix='.safetensors')
+                os.close(fd)
+                mx.save_safetensors(tmp_weights, dict(weights))
+                os.replace(tmp_weights, canonical_weights)
+            except Exception as e:
+                logger.warning(f"Could not cache canonical weights: {str(e)}")
+            finally:
+                if tmp_weights is not None and os.path.exists(tmp_weights):
+                    os.remove(tmp_weights)
 
         # Initialize and load the model
         model_instance = Transcriber(cfg)
         model_instance.load_weights(weights, strict=False)
+        del weights
         model_instance.eval()
         mx.eval(model_instance)
-        gc.collect()
+        if WARMUP:
+            warmup_model(model_instance)
 
         model = model_instance
-        model_loaded.set()
         logger.info("Model loaded successfully.")
     except Exception as e:
         logger.error(f"Failed to load model: {str(e)}")
-        model_loaded.set()
         raise
 
-# Start model loading in a background thread
-threading.Thread(target=load_model).start()
+def _make_temp_path(suffix: str) -> str:
+    """Create an empty temporary file in UPLOAD_DIR and return its path."""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=UPLOAD_DIR)
+    os.close(fd)
+    return path
+
+def _remove_temp_file(path: str) -> None:
+    """Remove a temporary file if it still exists."""
+    if os.path.exists(path):
+        os.remove(path)
+
+class BatchingTranscriber:
+    """
+    Collect concurrent quick-mode requests and run them through the model as one batch.
+
+    Requests arriving within BATCH_WINDOW_MS of each other (up to BATCH_MAX) are
+    grouped by language mode and decoded in a single forward pass.
+    """
 
-async def transcribe_sync(path_audio: str, quick: bool = True, any_lang: bool = True) -> str:
+    def __init__(self, window_ms: int = BATCH_WINDOW_MS, max_batch: int = BATCH_MAX):
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.queue = None
+        self.worker = None
+
+    def start(self):
+        """Start the background consumer on the running event loop."""
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background consumer."""
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+
+    async def submit(self, audio, any_lang: bool) -> str:
+        """Queue decoded audio samples and wait for their transcription."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((audio, any_lang, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            for any_lang in (True, False):
+                group = [item for item in batch if item[1] == any_lang]
+                if group:
+                    await self._transcribe(group, any_lang)
+
+    async def _transcribe(self, group, any_lang: bool):
+        # Skip requests whose client has already gone away
+        group = [item for item in group if not item[2].cancelled()]
+        if not group:
+            return
+        audios = [audio for audio, _, _ in group]
+        try:
+            async with inference_semaphore:
+                texts = await asyncio.to_thread(model.batch, audios, any_lang)
+        except Exception as e:
+            if len(group) == 1:
+                if not group[0][2].done():
+                    group[0][2].set_exception(e)
+                return
+            # Retry one by one so a single bad item only fails its own request
+            for audio, _, future in group:
+                await self._transcribe([(audio, any_lang, future)], any_lang)
+        else:
+            for (_, _, future), text in zip(group, texts):
+                if not future.done():
+                    future.set_result(text.strip())
+
+batcher = BatchingTranscriber()
+
+async def transcribe_sync(path_audio: str | bytes, quick: bool = True, any_lang: bool = True) -> str:
     """
     Asynchronous wrapper for the model's transcription function.
 
     Args:
-        path_audio (str): Path to the audio file.
+        path_audio (str | bytes): Path to the audio file, or its encoded contents.
         quick (bool): Whether to use quick transcription mode.
         any_lang (bool): Whether to use auto-detect for language (True) or English-only (False).
 
     Returns:
         str: Transcribed text.
     """
-    return await asyncio.to_thread(
-        lambda: model(
-            path_audio=path_audio,
-            any_lang=any_lang,
-            quick=quick
-        ).strip()
-    )
+    # Decode on a dedicated pool so it doesn't compete with file I/O on the default executor
+    loop = asyncio.get_running_loop()
+    audio = await loop.run_in_executor(decode_pool, decode_audio, path_audio)
+
+    if quick:
+        return await batcher.submit(audio, any_lang)
+
+    async with inference_semaphore:
+        return await asyncio.to_thread(
+            lambda: model(
+                path_audio=audio,
+                any_lang=any_lang,
+                quick=quick
+            ).strip()
+        )
 
 @app.post("/transcribe")
 async def transcribe_audio(
@@ -137,65 +304,90 @@ async def transcribe_audio(
         any_lang (bool, optional): Whether to use auto-detect for language (True) or English-only (False) (default is True).
 
     Returns:
-        dict: Transcription result containing the text, elapsed time, and quick mode status.
+        ORJSONResponse: JSON body containing the text, elapsed time, and quick mode status.
     """
     start_time = time.time()
 
-    # Wait for the model to be loaded
-    if not model_loaded.is_set():
-        await asyncio.to_thread(model_loaded.wait)
-
-    if model is None:
-        raise HTTPException(status_code=500, detail="Model failed to load.")
+    # Reject unsupported uploads before spending any I/O on them
+    suffix = Path(file.filename or '').suffix.lower()
+    if suffix not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=415, detail="Unsupported audio format. Use WAV, MP3, M4A, or FLAC.")
+    content_type = file.content_type or 'application/octet-stream'
+    if not content_type.startswith('audio/') and content_type != 'application/octet-stream':
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}.")
 
     try:
-        # Create uploads directory if it doesn't exist
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-        # Read the uploaded file content
-        content = await file.read()
-
-        # Write content to a temporary file securely
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as tmp_file:
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
+        if suffix in IN_MEMORY_EXTENSIONS and file.size is not None and file.size <= IN_MEMORY_MAX_BYTES:
+            # Decode small uploads straight from memory, skipping the disk round-trip
+            audio = await file.read()
+        else:
+            # Stream the upload to a temporary file in chunks to keep memory bounded
+            tmp_file_path = await asyncio.to_thread(_make_temp_path, suffix)
+            async with aiofiles.open(tmp_file_path, 'wb') as tmp_file:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await tmp_file.write(chunk)
+            audio = tmp_file_path
 
         # Transcribe audio asynchronously
-        transcription = await transcribe_sync(tmp_file_path, quick, any_lang)
+        transcription = await transcribe_sync(audio, quick, any_lang)
 
         elapsed_time = time.time() - start_time
 
-        return {
+        # Return the response directly to skip jsonable_encoder
+        return ORJSONResponse({
             "text": transcription,
             "elapsed_time": round(elapsed_time, 2),
             "quick_mode": quick,
             "any_lang": any_lang
-        }
+        })
 
     except Exception as e:
         logger.error(f"Transcription error: {str(e)}")
         raise HTTPException(status_code=500, detail="Transcription failed.")
     finally:
         # Clean up temporary file
-        if 'tmp_file_path' in locals() and os.path.exists(tmp_file_path):
+        if 'tmp_file_path' in locals():
             try:
-                os.remove(tmp_file_path)
+                await asyncio.to_thread(_remove_temp_file, tmp_file_path)
             except Exception as e:
                 logger.error(f"Error removing temporary file: {str(e)}")
 
+# The health payload never changes, so serialize it once
+HEALTH_BODY = orjson.dumps({"status": "healthy", "version": "1.0.0"})
+
 @app.get("/health")
 async def health_check():
     """
     Health check endpoint to verify the API is running.
 
     Returns:
-        dict: Status and version information.
+        Response: Pre-serialized JSON body with status and version information.
     """
-    return {"status": "healthy", "version": "1.0.0"}
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
 def run_server():
     """Entry point for the server"""
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
+
+def run_server_workers():
+    """
+    Entry point for serving with multiple gunicorn workers using uvicorn-worker's UvicornWorker.
+
+    The app is not preloaded: MLX state does not survive a fork, so each worker
+    imports this module and loads its own copy of the model. Memory usage
+    therefore grows linearly with the number of workers. The model loads during
+    the lifespan startup, before the worker reports to the arbiter, so the
+    gunicorn timeout is disabled by default to survive a cold start.
+    """
+    workers = max(1, min(os.cpu_count() or 1, MAX_WORKERS))
+    os.execvp("gunicorn", [
+        "gunicorn",
+        "-k", "uvicorn_worker.UvicornWorker",
+        "-w", str(workers),
+        "--timeout", str(WORKER_TIMEOUT),
+        "--bind", "0.0.0.0:8000",
+        "scripts.main:app",
+    ])
 
 if __name__ == '__main__':
     run_server()
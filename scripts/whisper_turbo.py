@@ -35,12 +35,16 @@ class Tokenizer:
             lol = [lol]
         return [self.encoding.decode(l) for l in lol]
 
-def load_audio(file, sr=16000):
+def decode_audio(file, sr=16000):
+    src, data = ("-", file) if isinstance(file, bytes) else (file, None)
     try:
-        out = run(["ffmpeg", "-nostdin", "-threads", "0", "-i", file, "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "-"], capture_output=True, check=True).stdout
+        out = run(["ffmpeg", "-nostdin", "-threads", "0", "-i", src, "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "-"], input=data, capture_output=True, check=True).stdout
     except CalledProcessError as e:
         raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
-    return mx.array(np.frombuffer(out, np.int16)).flatten().astype(mx.float32) / 32768.0
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+def load_audio(file, sr=16000):
+    return mx.array(decode_audio(file, sr))
 
 @lru_cache(maxsize=None)
 def mel_filters(n_mels):
@@ -53,7 +57,6 @@ def mel_filters(n_mels):
 def hanning(n_fft):
     return mx.array(np.hanning(n_fft + 1)[:-1])
 
-@lru_cache(maxsize=None)
 def stft(x, window, nperseg=400, noverlap=160, nfft=None, axis=-1, pad_mode="reflect"):
     if nfft is None:
         nfft = nperseg
@@ -78,7 +81,15 @@ def stft(x, window, nperseg=400, noverlap=160, nfft=None, axis=-1, pad_mode="ref
 
 @lru_cache(maxsize=None)
 def log_mel_spectrogram(audio, n_mels=128, padding=480000):
+    return compute_log_mel(audio, n_mels, padding)
+
+def audio_to_mel(audio):
     if isinstance(audio, str):
+        return log_mel_spectrogram(audio).astype(mx.float16)
+    return compute_log_mel(audio).astype(mx.float16)
+
+def compute_log_mel(audio, n_mels=128, padding=480000):
+    if isinstance(audio, (str, bytes)):
         audio = load_audio(audio)
     elif not isinstance(audio, mx.array):
         audio = mx.array(audio)
@@ -212,11 +223,9 @@ class Transcriber(nn.Module):
     def __init__(self, cfg):
         self.model = Whisper(cfg)
         self.tokenizer = Tokenizer()
-        self.len_sot = 0
     def __call__(self, path_audio, any_lang, quick):
-        raw = log_mel_spectrogram(path_audio).astype(mx.float16)
+        raw = audio_to_mel(path_audio)
         sot = mx.array([[50258, 50360, 50365]]) if any_lang else mx.array([[50258, 50259, 50360, 50365]])
-        self.len_sot = sot.shape[-1]
         txt = self.parallel(raw, sot) if quick else self.recurrent(raw, sot)
         return txt
     def recurrent(self, raw, sot):
@@ -229,22 +238,41 @@ class Transcriber(nn.Module):
             i += hop if hop > 0 else 3000
         new_tok = [i for i in new_tok.astype(mx.int32).tolist()[0] if i < 50257]
         return self.tokenizer.decode(new_tok)[0]
+    def batch(self, audios, any_lang):
+        raws = [audio_to_mel(a) for a in audios]
+        sot = mx.array([[50258, 50360, 50365]]) if any_lang else mx.array([[50258, 50259, 50360, 50365]])
+        raws = [raw[:(raw.shape[0]//3000)*3000].reshape(-1, 3000, 128) for raw in raws]
+        txts, group = [], []
+        for raw in raws:
+            if group and sum(r.shape[0] for r in group) + raw.shape[0] >= 360:
+                txts += self.parallel_many(group, sot)
+                group = []
+            group.append(raw)
+        return txts + self.parallel_many(group, sot)
     def parallel(self, raw, sot):
         raw = raw[:(raw.shape[0]//3000)*3000].reshape(-1, 3000, 128)
+        return self.parallel_many([raw], sot)[0]
+    def parallel_many(self, raws, sot):
+        lens = [raw.shape[0] for raw in raws]
+        raw = mx.concatenate(raws, axis=0)
         assert raw.shape[0] < 360
         sot = mx.repeat(sot, raw.shape[0], 0)
         new_tok = self.step(raw, sot)
         arg_hop = mx.argmax(new_tok, axis=-1).tolist()
         new_tok = [i[:a] for i,a in zip(new_tok.astype(mx.int32).tolist(),arg_hop)]
-        new_tok = [i for i in sum(new_tok, []) if i < 50257]
-        return self.tokenizer.decode(new_tok)[0]
+        txts, start = [], 0
+        for n in lens:
+            tok = [i for i in sum(new_tok[start:start+n], []) if i < 50257]
+            txts.append(self.tokenizer.decode(tok)[0])
+            start += n
+        return txts
     def step(self, mel, txt):
         mel = self.model.encode(mel)
         kv_cache = None
         B = mel.shape[0]
         new_tok = mx.zeros((B,0), dtype=mx.int32)
         goon = mx.ones((B,1), dtype=mx.bool_)
-        for i in range(449-self.len_sot):
+        for i in range(449-txt.shape[-1]):
             logits, kv_cache, _ = self.model.decode(txt=txt, mel=mel, kv_cache=kv_cache)
             txt = mx.argmax(logits[:,-1,:], axis=-1, keepdims=True) * goon
             mx.eval(txt)
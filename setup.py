@@ -23,6 +23,7 @@ setup(
     entry_points={
         "console_scripts": [
             "whisper-turboapi-server=scripts.main:run_server",  # Changed from app to run_server
+            "whisper-turboapi-workers=scripts.main:run_server_workers",
         ],
     },
 )
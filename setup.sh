@@ -221,7 +221,7 @@ print_step "4" "Verifying Installation"
 echo "Checking required packages..."
 MISSING_PACKAGES=false
 # List of all required packages
-REQUIRED_PACKAGES=("fastapi" "uvicorn" "aiohttp" "requests" "mlx" "numpy" "librosa" "tiktoken" "huggingface_hub" "fire")
+REQUIRED_PACKAGES=("fastapi" "uvicorn" "aiohttp" "requests" "mlx" "numpy" "librosa" "tiktoken" "huggingface_hub" "fire" "uvloop" "httptools" "aiofiles" "orjson" "gunicorn" "uvicorn_worker")
 
 for package in "${REQUIRED_PACKAGES[@]}"; do
     if ! python -c "import $package" 2>/dev/null; then
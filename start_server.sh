@@ -44,7 +44,7 @@ fi
 
 # Quick environment check
 MISSING_PACKAGES=false
-REQUIRED_PACKAGES=("fastapi" "uvicorn" "aiohttp" "requests" "mlx" "numpy" "librosa" "tiktoken" "huggingface_hub" "fire" 
+REQUIRED_PACKAGES=("fastapi" "uvicorn" "aiohttp" "requests" "mlx" "numpy" "librosa" "tiktoken" "huggingface_hub" "fire" "uvloop" "httptools" "aiofiles" "orjson" "gunicorn" "uvicorn_worker"
 )
 
 for package in "${REQUIRED_PACKAGES[@]}"; do
@@ -63,4 +63,4 @@ fi
 
 # Start the server
 echo "🚀 Starting WhisperTurboAPI server..."
-python -m uvicorn scripts.main:app --host "$HOST" --port "$PORT"
+python -m uvicorn scripts.main:app --host "$HOST" --port "$PORT" --loop uvloop --http httptools